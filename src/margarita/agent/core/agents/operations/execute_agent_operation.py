@@ -51,6 +51,10 @@ EQUALITY_OR_LOGICAL_OPERATORS = [
     "not ",
 ]
 
+LITERAL_VALUES = {"true": True, "false": False, "none": None}
+# Longest literal name; anything longer cannot be a literal, so skip lowercasing it
+_MAX_LITERAL_LENGTH = max(map(len, LITERAL_VALUES))
+
 
 class ExecuteAgentOperation:
     """Operation that orchestrates execution of a .mgx agent file.
@@ -371,10 +375,10 @@ class ExecuteAgentOperation:
         """
         condition = condition.strip()
 
-        literal_values = {"true": True, "false": False, "none": None}
-        lowered_condition = condition.lower()
-        if lowered_condition in literal_values:
-            return literal_values[lowered_condition]
+        if len(condition) <= _MAX_LITERAL_LENGTH:
+            lowered_condition = condition.lower()
+            if lowered_condition in LITERAL_VALUES:
+                return LITERAL_VALUES[lowered_condition]
 
         does_condition_contain_equality_or_logical = any(
             op in condition for op in EQUALITY_OR_LOGICAL_OPERATORS
@@ -383,7 +387,7 @@ class ExecuteAgentOperation:
         if does_condition_contain_equality_or_logical:
             try:
                 namespace = dict(context.data)
-                namespace.update(literal_values)
+                namespace.update(LITERAL_VALUES)
                 result = eval(condition, {"__builtins__": {}}, namespace)
                 return result
             except Exception:
@@ -4,10 +4,23 @@ margarita - A Python library template.
 This is the main package for margarita.
 """
 
-from margarita.language.cli import _build_uv_package_paths
+from typing import Any
 
 __version__ = "0.1.0"
 __author__ = "margarita"
 __email__ = "kyle@banyango.com"
 
 __all__ = ["_build_uv_package_paths"]
+
+
+def __getattr__(name: str) -> Any:
+    """Import CLI helpers on first access.
+
+    Importing the CLI pulls in click and importlib.metadata, which the parser and
+    renderer modules do not need.
+    """
+    if name == "_build_uv_package_paths":
+        from margarita.language.cli import _build_uv_package_paths
+
+        return _build_uv_package_paths
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
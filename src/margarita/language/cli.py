@@ -400,7 +400,8 @@ def _show_metadata_directory(template_dir: Path):
         click.echo(f"No .mg files found in directory: {template_dir}", err=True)
         sys.exit(1)
 
-    # Process each file
+    # Process each file; parse() resets the metadata, so one parser serves all files
+    parser = Parser()
     for i, template_file in enumerate(margarita_files):
         if i > 0:
             click.echo()  # Blank line between files
@@ -409,7 +410,6 @@ def _show_metadata_directory(template_dir: Path):
 
         try:
             template_content = template_file.read_text()
-            parser = Parser()
             metadata_dict, _ = parser.parse(template_content)
 
             if metadata_dict:
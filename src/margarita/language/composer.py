@@ -1,8 +1,12 @@
 from pathlib import Path
+from typing import TYPE_CHECKING, Any
 
-from margarita.language.parser import Parser
+from margarita.language.parser import Parser, fuse_text_nodes
 from margarita.language.renderer import Renderer
 
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
 
 class Composer:
     def __init__(
@@ -16,6 +20,7 @@ class Composer:
         self.package_paths = package_paths or {}
         self.parser = Parser()
         self._template_cache: dict[str, tuple] = {}
+        self._compiled_cache: dict[str, Callable[[dict[str, Any]], str]] = {}
 
     def load_template(self, template_path: str) -> tuple:
         """Load and parse a template, using cache if available.
@@ -24,15 +29,16 @@ class Composer:
             template_path (str): Relative path to the template file.
 
         Returns:
-            tuple: Parsed metadata and AST nodes of the template.
+            tuple: Parsed metadata and AST nodes of the template. Adjacent literal
+                text blocks are fused into a single TextNode.
         """
         cache_key = str(template_path)
 
         if cache_key not in self._template_cache:
             full_path = self.template_dir / template_path
             content = full_path.read_text()
-            parsed = self.parser.parse(content)
-            self._template_cache[cache_key] = parsed
+            metadata, nodes = self.parser.parse(content)
+            self._template_cache[cache_key] = (metadata, fuse_text_nodes(nodes))
 
         return self._template_cache[cache_key]
 
@@ -46,16 +52,18 @@ class Composer:
         Returns:
             str: Rendered template string.
         """
-        _, nodes = self.load_template(template_path)
+        cache_key = str(template_path)
 
-        renderer = Renderer(
-            context=context,
-            base_path=self.template_dir,
-            include_paths=self.include_paths,
-            package_paths=self.package_paths,
-        )
+        if cache_key not in self._compiled_cache:
+            _, nodes = self.load_template(template_path)
+            renderer = Renderer(
+                base_path=self.template_dir,
+                include_paths=self.include_paths,
+                package_paths=self.package_paths,
+            )
+            self._compiled_cache[cache_key] = renderer.compile(nodes)
 
-        return renderer.render(nodes)
+        return self._compiled_cache[cache_key](context or {})
 
     def compose_prompt(self, snippets: list[str], context: dict, separator: str = "\n\n") -> str:
         """Compose a prompt from multiple snippet files.
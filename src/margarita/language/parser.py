@@ -1,60 +1,91 @@
 import re
+from collections.abc import Callable
 from dataclasses import dataclass, field
+from functools import lru_cache
+
+_PARAMETER_PATTERN = re.compile(r"^(\w+)\s*\(([^)]+)\)\s*(.+)$")
+_LINE_PATTERN = re.compile(
+    r"(?P<if>if\s+(?P<if_condition>.+):)"
+    r"|(?P<elif>elif\s+(?P<elif_condition>.+):)"
+    r"|(?P<else>else:)"
+    r"|(?P<while>while\s+(?P<while_condition>.+):)"
+    r"|(?P<for>for\s+(?P<for_iterator>\w+)\s+in\s+(?P<for_iterable>range\([^)]*\)|\w+):)"
+    r"|(?P<include>\[\[\s*(?P<include_content>[^]]+)\s*]])"
+    r"|(?P<await_all>@await-all)"
+    r"|(?P<effect>@effect\s+(?P<effect_content>.+))"
+    r"|(?P<memory>@memory\s+(?P<memory_params>.+))"
+    r"|(?P<state>@state\s+(?P<state_name>\w+)\s*=\s*(?P<state_value>.+))"
+    r"|(?P<import>import\s+.+|from\s+.+\s+import\s+.+)"
+    r"|(?P<break>break)"
+    r"|(?P<text><<.*)"
+)
+# First characters of every alternative in _LINE_PATTERN
+_DIRECTIVE_FIRST_CHARS = frozenset("iewf[@b<")
+# Group numbers of the directives compared against a match's lastindex
+_IF = _LINE_PATTERN.groupindex["if"]
+_WHILE = _LINE_PATTERN.groupindex["while"]
+_FOR = _LINE_PATTERN.groupindex["for"]
+_ELIF = _LINE_PATTERN.groupindex["elif"]
+_ELSE = _LINE_PATTERN.groupindex["else"]
+_AWAIT_ALL = _LINE_PATTERN.groupindex["await_all"]
+_EFFECT = _LINE_PATTERN.groupindex["effect"]
+_COMMENT_PATTERN = re.compile(r"\A(?:[^\S\n]*//[^\n]*(?:\n|\Z))+|\n[^\S\n]*//[^\n]*")
+_INCLUDE_PARAM_PATTERN = re.compile(r"(\w+)=(?:\"([^\"]*)\"|([^\"\s]+))")
 
 
 # -------------------------
 # AST Nodes
 # -------------------------
-@dataclass
+@dataclass(slots=True)
 class Node:
     """Base class for AST nodes."""
 
     pass
 
 
-@dataclass
+@dataclass(slots=True)
 class TextNode(Node):
     content: str
 
 
-@dataclass
+@dataclass(slots=True)
 class WhileNode(Node):
     condition: str
     block: list[Node]
 
 
-@dataclass
+@dataclass(slots=True)
 class VariableNode(Node):
     name: str
 
 
-@dataclass
+@dataclass(slots=True)
 class IfNode(Node):
     condition: str
     true_block: list[Node]
     false_block: list[Node] | None = None
 
 
-@dataclass
+@dataclass(slots=True)
 class ForNode(Node):
     iterator: str
     iterable: str
     block: list[Node]
 
 
-@dataclass
+@dataclass(slots=True)
 class IncludeNode(Node):
     template_name: str
     params: dict[str, str] = field(default_factory=dict)
 
 
-@dataclass
+@dataclass(slots=True)
 class MetadataNode(Node):
     key: str
     value: str
 
 
-@dataclass
+@dataclass(slots=True)
 class EffectNode(Node):
     """Represents an @effect directive.
 
@@ -69,7 +100,7 @@ class EffectNode(Node):
     raw_content: str
 
 
-@dataclass
+@dataclass(slots=True)
 class AllAwaitNode(Node):
     """Represents an @await-all directive.
 
@@ -82,7 +113,7 @@ class AllAwaitNode(Node):
     effect_nodes: list[EffectNode]
 
 
-@dataclass
+@dataclass(slots=True)
 class StateNode(Node):
     """Represents a @state directive.
 
@@ -99,7 +130,7 @@ class StateNode(Node):
     initial_value: str  # The expression after '=', e.g., '{}', '0', '[]', etc.
 
 
-@dataclass
+@dataclass(slots=True)
 class ImportNode(Node):
     """Represents a Python-style import statement.
 
@@ -112,7 +143,7 @@ class ImportNode(Node):
     raw_import: str  # The full import statement
 
 
-@dataclass
+@dataclass(slots=True)
 class BreakNode(Node):
     """Represents a break statement inside a for loop.
 
@@ -125,7 +156,7 @@ class BreakNode(Node):
     pass
 
 
-@dataclass
+@dataclass(slots=True)
 class MemoryNode(Node):
     """Represents a @memory directive.
 
@@ -139,19 +170,148 @@ class MemoryNode(Node):
     params: str
 
 
+# -------------------------
+# AST passes
+# -------------------------
+def fuse_text_nodes(nodes: list[Node]) -> list[Node]:
+    """Merge runs of adjacent literal TextNodes into a single TextNode.
+
+    Text blocks without ``${...}`` references render to their content verbatim,
+    so consecutive ones can be concatenated ahead of time. This recurses into
+    if/for/while blocks and returns new lists; the input nodes are not modified.
+
+    Args:
+        nodes: List of parsed AST nodes
+
+    Returns:
+        Equivalent list of AST nodes with literal text runs merged
+    """
+    fused: list[Node] = []
+    for node in nodes:
+        # Exact type checks, matching the renderer's type-keyed dispatch
+        if type(node) is IfNode:
+            false_block = None if node.false_block is None else fuse_text_nodes(node.false_block)
+            node = IfNode(node.condition, fuse_text_nodes(node.true_block), false_block)
+        elif type(node) is ForNode:
+            node = ForNode(node.iterator, node.iterable, fuse_text_nodes(node.block))
+        elif type(node) is WhileNode:
+            node = WhileNode(node.condition, fuse_text_nodes(node.block))
+        elif type(node) is TextNode and fused and type(fused[-1]) is TextNode:
+            # Only merge when the result is still literal; this also guards against
+            # a "$" and a "{" from neighbouring blocks forming a new reference
+            content = fused[-1].content + node.content
+            if "${" not in content:
+                fused[-1] = TextNode(content)
+                continue
+
+        fused.append(node)
+
+    return fused
+
+
+class _OpenBlock:
+    """An if, while or for block whose body is still being parsed."""
+
+    __slots__ = ("branches", "else_nodes", "indent", "nodes", "opener")
+
+    def __init__(self, indent: int, opener: re.Match[str] | None):
+        self.indent = indent
+        self.opener = opener
+        # Nodes of the body (or the current if branch) being parsed
+        self.nodes: list[Node] = []
+        # (condition, block) pairs of the if and its elif branches
+        self.branches: list[tuple[str, list[Node]]] = []
+        self.else_nodes: list[Node] | None = None
+        if opener is not None and opener.lastindex == _IF:
+            self.branches.append((opener.group("if_condition"), self.nodes))
+
+    def start_branch(self, line_match: re.Match[str] | None) -> bool:
+        """Start an elif or else branch of an if block.
+
+        Args:
+            line_match: Match of a line aligned with the if statement
+
+        Returns:
+            True if the line started a new branch, False if it ends the block
+        """
+        if not self.branches or self.else_nodes is not None or line_match is None:
+            return False
+
+        kind = line_match.lastindex
+        if kind == _ELIF:
+            self.nodes = []
+            self.branches.append((line_match.group("elif_condition"), self.nodes))
+            return True
+        if kind == _ELSE:
+            self.nodes = []
+            self.else_nodes = self.nodes
+            return True
+        return False
+
+    def build(self) -> Node:
+        """Build the node for this block once its body is complete.
+
+        Returns:
+            The IfNode, WhileNode or ForNode for the block
+        """
+        opener = self.opener
+        if opener is not None:
+            kind = opener.lastindex
+            if kind == _WHILE:
+                return WhileNode(opener.group("while_condition"), self.nodes)
+            if kind == _FOR:
+                return ForNode(
+                    opener.group("for_iterator"), opener.group("for_iterable"), self.nodes
+                )
+
+        # Build nested IfNode chain from right to left
+        false_block = self.else_nodes
+        for condition, block in reversed(self.branches[1:]):
+            false_block = [IfNode(condition, block, false_block)]
+        condition, block = self.branches[0]
+        return IfNode(condition, block, false_block)
+
+
+def _close_blocks(stack: list[_OpenBlock], indent: int, line_match: re.Match[str] | None) -> bool:
+    """Close the open blocks a line at the given indentation falls outside of.
+
+    Each closed block is built and appended to its parent. An elif or else line
+    aligned with an open if starts its next branch instead of closing it.
+
+    Args:
+        stack: Open blocks, the outermost (which is never closed) first
+        indent: Indentation of the line
+        line_match: Match of the line, or None when closing at the end of input
+
+    Returns:
+        True if the line started a branch of an open if block
+    """
+    while len(stack) > 1 and indent <= stack[-1].indent:
+        block = stack[-1]
+        if indent == block.indent and block.start_branch(line_match):
+            return True
+        stack.pop()
+        stack[-1].nodes.append(block.build())
+    return False
+
+
 # -------------------------
 # Parser
 # -------------------------
 class Parser:
-    def __init__(self):
+    def __init__(self) -> None:
         self.metadata: dict[str, str | dict[str, str]] = {}
-        self.lines: list[tuple[int, str]] = []  # (indent_level, line_content)
+        self.lines: list[tuple[int, str, str]] = []  # (indent_level, line_content, stripped)
         self.pos: int = 0
         self.is_mgx: bool = False
 
     def parse(self, template: str) -> tuple[dict[str, str], list[Node]]:
         """Parse a Margarita template into metadata and an AST.
 
+        Results are cached per template content. Each call returns its own
+        metadata dict and node list, but the nodes themselves are shared between
+        calls with the same template and must not be mutated.
+
         Args:
             template (str): The template source string to parse.
 
@@ -161,16 +321,36 @@ class Parser:
                 - nodes: a list of top-level AST Node instances representing
                   the parsed template.
         """
+        metadata, nodes, self.is_mgx = _parse_template(template)
+        self.metadata = {
+            key: dict(value) if isinstance(value, dict) else value
+            for key, value in metadata.items()
+        }
+        return self.metadata, list(nodes)  # type: ignore[return-value]
+
+    def _parse_uncached(self, template: str) -> tuple[dict[str, str | dict[str, str]], list[Node]]:
+        """Parse a template without consulting the cache."""
+        # Rebind all per-template state, so a reused parser starts from scratch
         self.metadata = {}
-        self._preprocess(template)
         self.pos = 0
+        self.is_mgx = False
+
+        # Blank templates have no metadata or nodes; skip preprocessing entirely
+        if not template or template.isspace():
+            self.lines = []
+            return {}, []
+
+        self._preprocess(template)
         nodes = self._parse_block(base_indent=-1)
         return self.metadata, nodes
 
     def _preprocess(self, template: str) -> None:
         """Preprocess the template to extract metadata and prepare lines."""
+        # Normalize Windows line endings so text blocks don't keep a trailing \r
+        if "\r" in template:
+            template = template.replace("\r\n", "\n")
+
         lines = template.split("\n")
-        self.lines = []
 
         # Check for metadata block at the beginning (enclosed by ---)
         # Metadata is optional - only parse if template starts with ---
@@ -195,14 +375,13 @@ class Parser:
                     i += 1  # Skip closing ---
                     break
 
-                # Parse metadata line
-                metadata_match = re.match(r"^(\w+):\s*(.+)$", stripped)
-                if metadata_match:
-                    if metadata_match.group(1) == "parameter":
-                        # parse name (string) description from match group 2
-                        param_match = re.match(
-                            r"^(\w+)\s*\(([^)]+)\)\s*(.+)$", metadata_match.group(2).strip()
-                        )
+                # Parse metadata line: "key: value", split on the first colon only
+                key, separator, value = stripped.partition(":")
+                value = value.strip()
+                if separator and value and key.replace("_", "a").isalnum():
+                    if key == "parameter":
+                        # parse name (string) description from the value
+                        param_match = _PARAMETER_PATTERN.match(value)
                         if param_match:
                             param_name = param_match.group(1)
                             param_type = param_match.group(2)
@@ -212,226 +391,173 @@ class Parser:
                             )
 
                     else:
-                        self.metadata[metadata_match.group(1)] = metadata_match.group(2).strip()
+                        self.metadata[key] = value
                 i += 1
         else:
             # No metadata block, reset to start
             i = 0
 
         # Process remaining lines after metadata (or all lines if no metadata)
-        for j in range(i, len(lines)):
-            line = lines[j]
+        body = lines[i:]
 
-            # Check for comments (skip them)
-            if line.strip().startswith("//"):
-                continue
+        # Drop whole-line // comments from the body in one pass; this runs after the
+        # metadata scan so a comment can't change where the metadata block starts
+        if body and "//" in template:
+            body = _COMMENT_PATTERN.sub("", "\n".join(body)).split("\n")
 
-            # Calculate indentation level (number of leading spaces / 4)
-            indent = len(line) - len(line.lstrip())
-            self.lines.append((indent, line))
+        # Calculate indentation level (number of leading whitespace characters) and
+        # strip each line once, so the block parsers never strip it again
+        self.lines = []
+        append = self.lines.append
+        for line in body:
+            content = line.lstrip()
+            append((len(line) - len(content), line, content.rstrip()))
 
     def _parse_block(self, base_indent: int) -> list[Node]:
-        """Parse a block of nodes at a given indentation level."""
-        nodes: list[Node] = []
+        """Parse the remaining lines into nodes nested below base_indent.
 
-        while self.pos < len(self.lines):
-            indent, line = self.lines[self.pos]
-            stripped = line.strip()
+        Blocks opened by if/elif/else, while and for are tracked on an explicit
+        stack of open blocks rather than by recursion; a line closes every open
+        block whose opening line is indented at least as far as it is.
+        """
+        root = _OpenBlock(base_indent, None)
+        stack = [root]
+        lines = self.lines
+        line_count = len(lines)
 
-            # If we've dedented past the base level, stop
-            if stripped and indent <= base_indent:
-                break
+        while self.pos < line_count:
+            indent, _, stripped = lines[self.pos]
 
             # Skip empty lines
             if not stripped:
                 self.pos += 1
                 continue
 
-            # Check for control structures
-            if_match = re.match(r"^if\s+(.+):$", stripped)
-            for_match = re.match(r"^for\s+(\w+)\s+in\s+(range\([^)]*\)|\w+):$", stripped)
-            else_match = re.match(r"^else:$", stripped)
-            include_match = re.match(r"^\[\[\s*([^]]+)\s*]]$", stripped)
-            await_all_match = re.match(r"^@await-all$", stripped)
-            effect_match = re.match(r"^@effect\s+(.+)$", stripped)
-            memory_match = re.match(r"^@memory\s+(.+)$", stripped)
-            state_match = re.match(r"^@state\s+(\w+)\s*=\s*(.+)$", stripped)
-            import_match = re.match(r"^import\s+.+$", stripped)
-            from_import_match = re.match(r"^from\s+.+\s+import\s+.+$", stripped)
-            while_match = re.match(r"^while\s+(.+):$", stripped)
-            break_match = stripped == "break"
-            text_block_start = stripped.startswith("<<")
-
-            if if_match:
-                # Parse if statement
-                condition = if_match.group(1)
-                self.pos += 1
-                # Parse the true block - content should be more indented than the if statement
-                true_block = self._parse_block(indent)
-
-                # Collect elif branches as (condition, block) pairs
-                elif_branches: list[tuple[str, list[Node]]] = []
-                while self.pos < len(self.lines):
-                    next_indent, next_line = self.lines[self.pos]
-                    next_elif_match = re.match(r"^elif\s+(.+):$", next_line.strip())
-                    if next_indent == indent and next_elif_match:
-                        self.pos += 1
-                        elif_branches.append((next_elif_match.group(1), self._parse_block(indent)))
-                    else:
-                        break
-
-                # Check for optional final else
-                false_block = None
-                if self.pos < len(self.lines):
-                    next_indent, next_line = self.lines[self.pos]
-                    if next_indent == indent and next_line.strip() == "else:":
-                        self.pos += 1
-                        # Parse the false block - content should be more indented than the else
-                        false_block = self._parse_block(indent)
-
-                # Build nested IfNode chain from right to left
-                current_false = false_block
-                for elif_cond, elif_block in reversed(elif_branches):
-                    current_false = [IfNode(elif_cond, elif_block, current_false)]
-
-                nodes.append(IfNode(condition, true_block, current_false))
-
-            elif while_match:
-                condition = while_match.group(1)
-                self.pos += 1
-                block = self._parse_block(indent)
-                nodes.append(WhileNode(condition, block))
-
-            elif for_match:
-                # Parse for loop
-                iterator = for_match.group(1)
-                iterable = for_match.group(2)
-                self.pos += 1
-                # Parse the loop block - content should be more indented than the for statement
-                block = self._parse_block(indent)
-                nodes.append(ForNode(iterator, iterable, block))
-
-            elif else_match:
-                # We've hit an else at this level, return to let parent handle it
-                break
-
-            elif re.match(r"^elif\s+(.+):$", stripped):
-                # We've hit an elif at this level, return to let parent handle it
-                break
+            # Classify the line with a single match and dispatch on the directive;
+            # lines whose first character starts no directive skip the match
+            line_match = (
+                _LINE_PATTERN.fullmatch(stripped) if stripped[0] in _DIRECTIVE_FIRST_CHARS else None
+            )
 
-            elif include_match:
-                # Parse include with optional parameters
-                include_content = include_match.group(1).strip()
-                # Parse [[filename param1="value1" param2="value2"]]
-                parts = include_content.split(None, 1)
-                template_name = parts[0]
-                params = {}
-
-                if len(parts) > 1:
-                    # Parse parameters
-                    param_str = parts[1]
-                    param_matches = re.finditer(r"(\w+)=(?:\"([^\"]*)\"|([^\"\s]+))", param_str)
-                    params = {}
-                    for m in param_matches:
-                        key = m.group(1)
-                        value = m.group(2) if m.group(2) is not None else m.group(3)
-                        params[key] = value
-
-                nodes.append(IncludeNode(template_name, params))
+            # Close the blocks this line dedents out of; an elif/else aligned with
+            # an open if starts its next branch instead
+            if indent <= stack[-1].indent and _close_blocks(stack, indent, line_match):
                 self.pos += 1
+                continue
 
-            elif await_all_match:
-                # Parse @await-all block — collect indented @effect children
-                self.pos += 1
-                effect_nodes: list[EffectNode] = []
-                while self.pos < len(self.lines):
-                    child_indent, child_line = self.lines[self.pos]
-                    child_stripped = child_line.strip()
-                    if not child_stripped:
-                        self.pos += 1
-                        continue
-                    if child_indent <= indent:
-                        break
-                    child_effect = re.match(r"^@effect\s+(.+)$", child_stripped)
-                    if child_effect:
-                        effect_nodes.append(EffectNode(child_effect.group(1).strip()))
-                        self.pos += 1
-                    else:
-                        break
-                nodes.append(AllAwaitNode(effect_nodes))
-                self.is_mgx = True
-
-            elif effect_match:
-                # Parse @effect directive
-                # Capture everything after "@effect " and store as raw_content
-                raw_content = effect_match.group(1).strip()
-                nodes.append(EffectNode(raw_content))
-                self.is_mgx = True
+            if line_match is None:
+                # Unknown line - skip
                 self.pos += 1
+                continue
 
-            elif memory_match:
-                # Parse @memory directive
-                # Capture everything after "@memory " and store as params
-                params = memory_match.group(1).strip()
-                nodes.append(MemoryNode(params))
-                self.pos += 1
+            kind = line_match.lastindex
+            if kind in (_ELSE, _ELIF):
+                # An else/elif without a matching if ends the template
+                break
 
-            elif state_match:
-                # Parse @state directive
-                # Capture the variable name and initial value
-                variable_name = state_match.group(1)
-                initial_value = state_match.group(2).strip()
-                nodes.append(StateNode(variable_name, initial_value))
-                self.is_mgx = True
+            if kind in (_IF, _WHILE, _FOR):
+                # Content of the block should be more indented than its opening line
+                stack.append(_OpenBlock(indent, line_match))
                 self.pos += 1
+                continue
 
-            elif import_match or from_import_match:
-                # Parse Python-style import statement
-                # Store the entire import line as-is
-                nodes.append(ImportNode(stripped))
-                self.is_mgx = True
+            node = _LINE_HANDLERS[kind](self, line_match, indent)
+            if node is not None:
+                stack[-1].nodes.append(node)
+
+        # Close the blocks still open at the end of the template
+        _close_blocks(stack, base_indent, None)
+        return root.nodes
+
+    def _parse_include(self, line_match: re.Match[str], indent: int) -> Node:
+        """Parse an include with optional parameters."""
+        include_content = line_match.group("include_content").strip()
+        # Parse [[filename param1="value1" param2=value2]]
+        template_name, *rest = include_content.split(None, 1)
+        param_str = rest[0] if rest else ""
+        # Unmatched alternatives come back as "", so a quoted value wins when present
+        params = {
+            key: quoted or bare for key, quoted, bare in _INCLUDE_PARAM_PATTERN.findall(param_str)
+        }
+
+        self.pos += 1
+        return IncludeNode(template_name, params)
+
+    def _parse_await_all(self, line_match: re.Match[str], indent: int) -> Node:
+        """Parse an @await-all block, collecting its indented @effect children."""
+        self.pos += 1
+        effect_nodes: list[EffectNode] = []
+        while self.pos < len(self.lines):
+            child_indent, _, child_stripped = self.lines[self.pos]
+            if not child_stripped:
                 self.pos += 1
-
-            elif break_match:
-                # Parse break statement
-                nodes.append(BreakNode())
+                continue
+            if child_indent <= indent:
+                break
+            child_match = _LINE_PATTERN.fullmatch(child_stripped)
+            if child_match and child_match.lastindex == _EFFECT:
+                effect_nodes.append(EffectNode(child_match.group("effect_content").strip()))
                 self.pos += 1
-
-            elif text_block_start:
-                # Parse text block
-                text_content = self._parse_text_block()
-                if text_content:
-                    nodes.append(TextNode(text_content))
-
             else:
-                # Unknown line - skip
-                self.pos += 1
-
-        return nodes
+                break
+        self.is_mgx = True
+        return AllAwaitNode(effect_nodes)
+
+    def _parse_effect(self, line_match: re.Match[str], indent: int) -> Node:
+        """Parse an @effect directive, storing everything after "@effect " as raw_content."""
+        self.is_mgx = True
+        self.pos += 1
+        return EffectNode(line_match.group("effect_content").strip())
+
+    def _parse_memory(self, line_match: re.Match[str], indent: int) -> Node:
+        """Parse a @memory directive, storing everything after "@memory " as params."""
+        self.pos += 1
+        return MemoryNode(line_match.group("memory_params").strip())
+
+    def _parse_state(self, line_match: re.Match[str], indent: int) -> Node:
+        """Parse a @state directive with its variable name and initial value."""
+        self.is_mgx = True
+        self.pos += 1
+        return StateNode(line_match.group("state_name"), line_match.group("state_value").strip())
+
+    def _parse_import(self, line_match: re.Match[str], indent: int) -> Node:
+        """Parse a Python-style import statement, storing the entire line as-is."""
+        self.is_mgx = True
+        self.pos += 1
+        return ImportNode(line_match.group("import"))
+
+    def _parse_break(self, line_match: re.Match[str], indent: int) -> Node:
+        """Parse a break statement."""
+        self.pos += 1
+        return BreakNode()
+
+    def _parse_text(self, line_match: re.Match[str], indent: int) -> Node | None:
+        """Parse a text block."""
+        text_content = self._parse_text_block()
+        return TextNode(text_content) if text_content else None
 
     def _parse_text_block(self) -> str:
         """Parse a text block delimited by << and >>."""
-        indent, first_line = self.lines[self.pos]
+        indent, _, first_stripped = self.lines[self.pos]
 
         # Check if it's a single-line text block
-        if first_line.strip().startswith("<<") and first_line.strip().endswith(">>"):
+        if first_stripped.startswith("<<") and first_stripped.endswith(">>"):
             # Single line block
-            content = first_line.strip()[2:-2].strip()
+            content = first_stripped[2:-2].strip()
             self.pos += 1
-            # Process variables in the content
-            processed = self._process_text_variables(content)
+            # ${var} references stay in the raw content; the renderer resolves them
             # Add newline after text block
-            return processed + "\n" if processed else processed
+            return content + "\n" if content else content
 
         # Multi-line block
-        if not first_line.strip().startswith("<<"):
+        if not first_stripped.startswith("<<"):
             return ""
 
         # The block's base indentation is the indentation of the << line
         block_indent = indent
 
         # Check if there's content after << on the first line
-        first_line_content = first_line.strip()[2:].strip()  # Remove << and strip
+        first_line_content = first_stripped[2:].strip()  # Remove << and strip
 
         self.pos += 1  # Move past the << line
         content_lines = []
@@ -440,48 +566,56 @@ class Parser:
         if first_line_content:
             content_lines.append(first_line_content)
 
-        while self.pos < len(self.lines):
-            line_indent, line = self.lines[self.pos]
-            stripped = line.strip()
-
-            if stripped == ">>":
-                self.pos += 1  # Skip the >> line
-                break
-
-            # Remove the block's base indentation from each line
-            # Empty lines are kept as-is
-            if line:  # Non-empty line
-                if line_indent >= block_indent:
-                    # Remove the base indentation
-                    dedented_line = line[block_indent:]
-                else:
-                    # Line is less indented than the block - keep as-is
-                    dedented_line = line
-            else:
-                # Empty line
-                dedented_line = ""
-
-            content_lines.append(dedented_line)
-            self.pos += 1
-
-        content = "\n".join(content_lines)
-        # Process variables in the content
-        processed = self._process_text_variables(content)
-        # Always add a trailing newline to text blocks to ensure proper spacing
-        # Special case: if content_lines has content (even if empty strings), add newline
-        if processed or content_lines:
-            processed += "\n"
-        return processed
-
-    def _process_text_variables(self, text: str) -> str:
-        """Convert ${var} syntax to internal representation."""
-        # For now, we'll convert ${var} to {{var}} internally for compatibility
-        # But we need to track these as VariableNodes within TextNodes
-
-        # Actually, we need to split the text into TextNode and VariableNode pieces
-        # For simplicity in this iteration, we'll leave the text as-is and handle
-        # variable substitution in a separate pass or in the renderer
-
-        # Let's use a placeholder approach: we'll keep ${var} as is in TextNode
-        # and the renderer will handle the substitution
-        return text
+        # Find the closing >> line, then dedent the lines in between in one pass
+        lines = self.lines
+        line_count = len(lines)
+        end = self.pos
+        while end < line_count and lines[end][2] != ">>":
+            end += 1
+
+        # Remove the block's base indentation from each line; lines indented less
+        # than the block (including empty lines) are kept as-is
+        content_lines.extend(
+            line[block_indent:] if line_indent >= block_indent else line
+            for line_indent, line, _ in lines[self.pos : end]
+        )
+        # Skip the >> line when the block is closed
+        self.pos = end + 1 if end < line_count else end
+
+        # Always add a trailing newline to text blocks to ensure proper spacing, even
+        # if the lines are all empty; joining with a final empty line adds it
+        # without copying the content a second time
+        if content_lines:
+            content_lines.append("")
+        # ${var} references stay in the raw content; the renderer resolves them
+        return "\n".join(content_lines)
+
+
+# Keyed by the directive's group number in _LINE_PATTERN (the lastindex of a match)
+_LINE_HANDLERS: dict[int | None, Callable[[Parser, re.Match[str], int], Node | None]] = {
+    _LINE_PATTERN.groupindex["include"]: Parser._parse_include,
+    _AWAIT_ALL: Parser._parse_await_all,
+    _EFFECT: Parser._parse_effect,
+    _LINE_PATTERN.groupindex["memory"]: Parser._parse_memory,
+    _LINE_PATTERN.groupindex["state"]: Parser._parse_state,
+    _LINE_PATTERN.groupindex["import"]: Parser._parse_import,
+    _LINE_PATTERN.groupindex["break"]: Parser._parse_break,
+    _LINE_PATTERN.groupindex["text"]: Parser._parse_text,
+}
+
+
+@lru_cache(maxsize=128)
+def _parse_template(
+    template: str,
+) -> tuple[dict[str, str | dict[str, str]], tuple[Node, ...], bool]:
+    """Parse a template once per distinct content.
+
+    Args:
+        template: The template source string to parse
+
+    Returns:
+        Tuple of the metadata, the top-level nodes and whether the template is .mgx
+    """
+    parser = Parser()
+    metadata, nodes = parser._parse_uncached(template)
+    return metadata, tuple(nodes), parser.is_mgx
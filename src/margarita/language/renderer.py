@@ -5,12 +5,14 @@ by applying variable substitution and control flow logic.
 """
 
 import ast
+import operator
 import re
+from collections.abc import Callable
+from functools import lru_cache
 from pathlib import Path
-from typing import Any
+from typing import Any, ClassVar
 
 from margarita.language.parser import (
-    AllAwaitNode,
     BreakNode,
     ForNode,
     IfNode,
@@ -20,6 +22,7 @@ from margarita.language.parser import (
     TextNode,
     VariableNode,
     WhileNode,
+    fuse_text_nodes,
 )
 
 EQUALITY_OR_LOGICAL_OPERATORS = (
@@ -36,6 +39,8 @@ EQUALITY_OR_LOGICAL_OPERATORS = (
     "not ",
 )
 
+_RANGE_PATTERN = re.compile(r"^range\((.+)\)$")
+
 
 class _BreakSignal(Exception):
     """Internal signal raised when a BreakNode is encountered inside a for loop."""
@@ -43,16 +48,16 @@ class _BreakSignal(Exception):
     pass
 
 
-# Mapping of ast comparison/bool operator types to callables
-_CMP_OPS: dict[type, Any] = {
-    ast.Eq: lambda a, b: a == b,
-    ast.NotEq: lambda a, b: a != b,
-    ast.Lt: lambda a, b: a < b,
-    ast.LtE: lambda a, b: a <= b,
-    ast.Gt: lambda a, b: a > b,
-    ast.GtE: lambda a, b: a >= b,
-    ast.In: lambda a, b: a in b,
-    ast.NotIn: lambda a, b: a not in b,
+# Mapping of ast comparison operator types to callables
+_CMP_OPS: dict[type, Callable[[Any, Any], Any]] = {
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+    ast.In: lambda a, b: operator.contains(b, a),
+    ast.NotIn: lambda a, b: not operator.contains(b, a),
 }
 
 _ALLOWED_NODES = frozenset(
@@ -84,108 +89,421 @@ _CONSTANT_ALIASES: dict[str, Any] = {
 }
 
 
-class _SafeConditionEvaluator(ast.NodeVisitor):
-    """Walks a parsed AST expression and evaluates it against a context dict.
+# A compiled expression evaluates against the variable scopes, innermost last
+_CompiledExpression = Callable[[list[dict[str, Any]]], Any]
+
+
+def _raise_value_error(message: str) -> _CompiledExpression:
+    """Compile an unsupported expression into a function raising ValueError.
 
-    Only a strict whitelist of node types is permitted; anything else raises
-    ``ValueError`` so the caller can treat the condition as unevaluable.
+    The error is deferred to evaluation, so a short-circuiting ``and``/``or`` or
+    comparison chain that never reaches the expression still evaluates.
     """
 
-    def __init__(self, context: dict[str, Any]):
-        self._context = context
+    def fail(_scopes: list[dict[str, Any]]) -> Any:
+        raise ValueError(message)
 
-    def visit(self, node: ast.AST) -> Any:  # type: ignore[override]
-        if type(node) not in _ALLOWED_NODES:
-            raise ValueError(f"Unsafe AST node type: {type(node).__name__}")
-        return super().visit(node)
+    return fail
 
-    # --- literal values ---
 
-    def visit_Constant(self, node: ast.Constant) -> Any:
-        return node.value
+def _compile_expression(node: ast.AST) -> _CompiledExpression:
+    """Compile a parsed condition expression into a function of the variable scopes.
 
-    # --- variable lookup (Name) ---
+    Only a strict whitelist of node types is permitted; anything else compiles to
+    a function raising ``ValueError`` so the caller can treat the condition as
+    unevaluable. Names, literals and comparison operators are resolved here, once,
+    instead of on every evaluation.
+
+    Args:
+        node: The expression node to compile
+
+    Returns:
+        Function evaluating the expression against the variable scopes
+    """
+    node_type = type(node)
+    if node_type not in _ALLOWED_NODES:
+        return _raise_value_error(f"Unsafe AST node type: {node_type.__name__}")
+
+    # --- literal values ---
+    if isinstance(node, ast.Constant):
+        constant = node.value
+        return lambda _scopes: constant
 
-    def visit_Name(self, node: ast.Name) -> Any:
+    # --- variable lookup (Name) ---
+    if isinstance(node, ast.Name):
         if node.id in _CONSTANT_ALIASES:
-            return _CONSTANT_ALIASES[node.id]
-        return self._get_value(node.id)
+            alias = _CONSTANT_ALIASES[node.id]
+            return lambda _scopes: alias
+        return _compile_lookup(node.id)
 
     # --- dotted attribute access (e.g. user.name) ---
-
-    def visit_Attribute(self, node: ast.Attribute) -> Any:
+    if isinstance(node, ast.Attribute):
         attr = node.attr
         if attr.startswith("_"):
-            raise ValueError(f"Access to private/dunder attribute '{attr}' is not allowed")
-        obj = self.visit(node.value)
-        if isinstance(obj, dict):
-            return obj.get(attr)
-        return getattr(obj, attr, None)
+            return _raise_value_error(f"Access to private/dunder attribute '{attr}' is not allowed")
+        value = _compile_expression(node.value)
 
-    # --- collections ---
+        def attribute(scopes: list[dict[str, Any]]) -> Any:
+            obj = value(scopes)
+            if isinstance(obj, dict):
+                return obj.get(attr)
+            return getattr(obj, attr, None)
 
-    def visit_List(self, node: ast.List) -> list:
-        return [self.visit(el) for el in node.elts]
+        return attribute
 
-    def visit_Tuple(self, node: ast.Tuple) -> tuple:
-        return tuple(self.visit(el) for el in node.elts)
+    # --- collections ---
+    if isinstance(node, ast.List):
+        items = tuple(map(_compile_expression, node.elts))
+        return lambda scopes: [item(scopes) for item in items]
 
-    # --- boolean operators ---
+    if isinstance(node, ast.Tuple):
+        items = tuple(map(_compile_expression, node.elts))
+        return lambda scopes: tuple(item(scopes) for item in items)
 
-    def visit_BoolOp(self, node: ast.BoolOp) -> Any:
+    # --- boolean operators ---
+    if isinstance(node, ast.BoolOp):
+        operands = tuple(map(_compile_expression, node.values))
         if isinstance(node.op, ast.And):
-            result: Any = True
-            for value in node.values:
-                result = self.visit(value)
-                if not result:
-                    return result
-            return result
-        else:  # Or
-            result = False
-            for value in node.values:
-                result = self.visit(value)
+
+            def and_(scopes: list[dict[str, Any]]) -> Any:
+                result: Any = True
+                for operand in operands:
+                    result = operand(scopes)
+                    if not result:
+                        return result
+                return result
+
+            return and_
+
+        def or_(scopes: list[dict[str, Any]]) -> Any:
+            result: Any = False
+            for operand in operands:
+                result = operand(scopes)
                 if result:
                     return result
             return result
 
-    def visit_UnaryOp(self, node: ast.UnaryOp) -> Any:
-        operand = self.visit(node.operand)
+        return or_
+
+    if isinstance(node, ast.UnaryOp):
+        operand = _compile_expression(node.operand)
         if isinstance(node.op, ast.Not):
-            return not operand
-        raise ValueError(f"Unsupported unary operator: {type(node.op).__name__}")
+            return lambda scopes: not operand(scopes)
+
+        message = f"Unsupported unary operator: {type(node.op).__name__}"
+
+        def unsupported(scopes: list[dict[str, Any]]) -> Any:
+            operand(scopes)
+            raise ValueError(message)
+
+        return unsupported
 
     # --- comparison operators ---
+    if isinstance(node, ast.Compare):
+        left_operand = _compile_expression(node.left)
+        # (operator function or None if unsupported, operator name, right operand)
+        comparisons = tuple(
+            (_CMP_OPS.get(type(op)), type(op).__name__, _compile_expression(comparator))
+            for op, comparator in zip(node.ops, node.comparators)
+        )
 
-    def visit_Compare(self, node: ast.Compare) -> bool:
-        left = self.visit(node.left)
-        for op, comparator in zip(node.ops, node.comparators):
-            right = self.visit(comparator)
-            fn = _CMP_OPS.get(type(op))
-            if fn is None:
-                raise ValueError(f"Unsupported comparison operator: {type(op).__name__}")
-            if not fn(left, right):
-                return False
-            left = right
-        return True
+        def compare(scopes: list[dict[str, Any]]) -> bool:
+            left = left_operand(scopes)
+            for fn, name, right_operand in comparisons:
+                right = right_operand(scopes)
+                if fn is None:
+                    raise ValueError(f"Unsupported comparison operator: {name}")
+                if not fn(left, right):
+                    return False
+                left = right
+            return True
+
+        return compare
+
+    return lambda _scopes: None
+
+
+@lru_cache(maxsize=512)
+def _split_name(name: str) -> tuple[str, ...]:
+    """Split a dotted variable name like "user.name" into its parts, cached per name."""
+    return tuple(name.split("."))
+
+
+@lru_cache(maxsize=1024)
+def _split_text(content: str) -> tuple[str, ...]:
+    """Split text content into alternating literal and variable name segments.
+
+    ``"Hi ${name}!"`` becomes ``("Hi ", "name", "!")``: even indices are literal
+    text and odd indices are variable names. Placeholders are located with
+    ``str.find`` and only ``${name}`` with a name of word characters and dots is
+    substituted; anything else is kept as literal text. Cached per content.
+
+    Args:
+        content: Raw text block content
+
+    Returns:
+        Tuple of segments, always of odd length
+    """
+    segments: list[str] = []
+    literal_start = 0
+    start = content.find("${")
+    while start != -1:
+        end = content.find("}", start + 2)
+        if end == -1:
+            break
+        name = content[start + 2 : end]
+        if name.replace(".", "a").replace("_", "a").isalnum():
+            segments.append(content[literal_start:start])
+            segments.append(name)
+            literal_start = end + 1
+            start = content.find("${", literal_start)
+        else:
+            start = content.find("${", start + 1)
+    segments.append(content[literal_start:])
+    return tuple(segments)
+
+
+def _lookup(scopes: list[dict[str, Any]], parts: tuple[str, ...]) -> Any:
+    """Resolve a split variable name against a stack of scopes.
 
-    # --- helpers ---
+    The first part is looked up from the innermost scope outwards; the remaining
+    parts are resolved as dict keys or attributes.
 
-    def _get_value(self, name: str) -> Any:
-        parts = name.split(".")
-        value: Any = self._context
-        for part in parts:
-            if isinstance(value, dict):
-                value = value.get(part)
-            elif hasattr(value, part):
-                value = getattr(value, part)
-            else:
-                return None
-            if value is None:
-                return None
-        return value
+    Args:
+        scopes: Variable scopes, innermost last
+        parts: Variable name split on dots, e.g. ("user", "name")
+
+    Returns:
+        The variable value or None if not found
+    """
+    head = parts[0]
+    for scope in reversed(scopes):
+        if head in scope:
+            value = scope[head]
+            break
+    else:
+        return None
+
+    if value is None:
+        return None
+
+    for part in parts[1:]:
+        if isinstance(value, dict):
+            value = value.get(part)
+        else:
+            value = getattr(value, part, None)
+
+        if value is None:
+            return None
+
+    return value
+
+
+@lru_cache(maxsize=512)
+def _compile_lookup(name: str) -> Callable[[list[dict[str, Any]]], Any]:
+    """Compile a dotted variable name into a function of the variable scopes.
+
+    Plain names, the common case, skip the attribute walk of ``_lookup``
+    entirely. Cached per name.
+
+    Args:
+        name: Variable name, e.g. "user" or "user.name"
+
+    Returns:
+        Function returning the variable value or None if not found
+    """
+    parts = _split_name(name)
+    if len(parts) > 1:
+        return lambda scopes: _lookup(scopes, parts)
+
+    head = parts[0]
+
+    def lookup(scopes: list[dict[str, Any]]) -> Any:
+        for scope in reversed(scopes):
+            if head in scope:
+                return scope[head]
+        return None
+
+    return lookup
+
+
+# A compiled block renders into the output buffer using the given scopes
+_CompiledBlock = Callable[[list[dict[str, Any]], list[str]], None]
+
+
+@lru_cache(maxsize=512)
+def _parse_condition(condition: str) -> ast.expr | None:
+    """Parse a condition expression, cached per condition string.
+
+    Args:
+        condition: The stripped condition string
+
+    Returns:
+        The expression node, or None if the condition is not valid syntax
+    """
+    try:
+        return ast.parse(condition, mode="eval").body
+    except Exception:
+        return None
+
+
+@lru_cache(maxsize=512)
+def _fold_condition(condition: str) -> bool | None:
+    """Evaluate a condition ahead of time if it references no variables.
+
+    A comparison of literals such as ``1 == 2`` or ``"a" != "b"`` has the same
+    value in every context, so it can be evaluated once while compiling.
+
+    Args:
+        condition: The condition string to fold
+
+    Returns:
+        The constant value of the condition, or None if it depends on the context
+        or cannot be evaluated
+    """
+    condition = condition.strip()
+    if not any(op in condition for op in EQUALITY_OR_LOGICAL_OPERATORS):
+        # A lone name is always a variable lookup
+        return None
+
+    tree = _parse_condition(condition)
+    if tree is None:
+        return None
+
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and node.id not in _CONSTANT_ALIASES:
+            return None
+
+    try:
+        return bool(_compile_expression(tree)([]))
+    except Exception:
+        return None
+
+
+@lru_cache(maxsize=512)
+def _compile_condition(condition: str) -> Callable[[list[dict[str, Any]]], bool | None]:
+    """Compile a condition into a function of the variable scopes.
+
+    The expression is classified and parsed once and cached per condition string,
+    so an if inside a loop does not re-parse it on every iteration.
+
+    Supports: or, and, not, in, not in, ==, !=, >, <, >=, <=, and simple truthy
+    checks. No arbitrary code execution — only a strict whitelist of AST node types
+    is allowed.
+
+    Args:
+        condition: The condition string to compile
+
+    Returns:
+        Function returning True/False for the condition, or None on error
+    """
+    condition = condition.strip()
+
+    if not any(op in condition for op in EQUALITY_OR_LOGICAL_OPERATORS):
+        # Simple variable — evaluate as a truthy check
+        lookup = _compile_lookup(condition)
+        return lambda scopes: Renderer._is_truthy(lookup(scopes))
+
+    constant = _fold_condition(condition)
+    if constant is not None:
+        return lambda _scopes: constant
+
+    tree = _parse_condition(condition)
+    if tree is None:
+        return lambda _scopes: None
+    try:
+        expression = _compile_expression(tree)
+    except Exception:
+        return lambda _scopes: None
+
+    def evaluate(scopes: list[dict[str, Any]]) -> bool | None:
+        try:
+            return bool(expression(scopes))
+        except Exception:
+            return None
+
+    return evaluate
+
+
+@lru_cache(maxsize=512)
+def _compile_iterable(expr: str) -> Callable[[list[dict[str, Any]]], Any]:
+    """Compile a for-loop iterable into a function of the variable scopes.
+
+    The iterable is either a variable or a range() call; range() arguments are
+    classified as integer literals or variables once, here, and the result is
+    cached per expression.
+
+    Args:
+        expr: The iterable expression, a variable name or a range() call
+
+    Returns:
+        Function returning the iterable to loop over
+    """
+    expr = expr.strip()
+    range_match = _RANGE_PATTERN.match(expr)
+    if not range_match:
+        return _compile_lookup(expr)
+
+    args: list[int | tuple[str, ...]] = []
+    for arg in range_match.group(1).split(","):
+        arg = arg.strip()
+        try:
+            args.append(int(arg))
+        except ValueError:
+            args.append(_split_name(arg))
+
+    def resolve_range(scopes: list[dict[str, Any]]) -> Any:
+        int_args = []
+        for arg in args:
+            if isinstance(arg, int):
+                int_args.append(arg)
+                continue
+            val = _lookup(scopes, arg)
+            if val is None:
+                return []
+            int_args.append(int(val))
+        return range(*int_args)
+
+    return resolve_range
+
+
+@lru_cache(maxsize=128)
+def _load_include(path: str, mtime_ns: int) -> list[Node]:  # noqa: ARG001
+    """Read and parse an included template.
+
+    Results are cached per path and modification time, so an include rendered
+    repeatedly (e.g. inside a loop) is only read and parsed once, while edits to
+    the file on disk are still picked up.
+
+    Args:
+        path: Absolute path of the included template
+        mtime_ns: Modification time of the file, used as part of the cache key
+
+    Returns:
+        Parsed AST nodes of the included template, with literal text fused
+    """
+    with open(path, encoding="utf-8") as f:
+        template_content = f.read()
+
+    # Parser.parse is already cached per content, so files with identical
+    # content share one parse
+    _, nodes = Parser().parse(template_content)
+    return fuse_text_nodes(nodes)
 
 
 class Renderer:
+    # Names of the methods compiling each node type, by exact node type; they are
+    # looked up by name, so a subclass can override any of them
+    _HANDLER_NAMES: ClassVar[dict[type[Node], str]] = {
+        TextNode: "_compile_text",
+        VariableNode: "_compile_variable",
+        IfNode: "_compile_if",
+        WhileNode: "_compile_while",
+        ForNode: "_compile_for",
+        BreakNode: "_compile_break",
+        IncludeNode: "_compile_include",
+    }
+
     def __init__(
         self,
         context: dict[str, Any] | None = None,
@@ -209,128 +527,250 @@ class Renderer:
         self.base_path = base_path or Path.cwd()
         self.include_paths = include_paths or []
         self.package_paths = package_paths or {}
+        # Resolved include template paths by the name used in the include
+        self._include_files: dict[str, Path] = {}
+        # Compiled included templates by path, with the mtime they were compiled at
+        self._compiled_includes: dict[str, tuple[int, _CompiledBlock]] = {}
 
     def render(self, nodes: list[Node]) -> str:
         """Render a list of AST nodes into a string.
 
+        The nodes are compiled as in ``compile``, without fusing adjacent text
+        first since the result is used only once, and rendered with this
+        renderer's context.
+
         Args:
             nodes: List of parsed AST nodes to render
 
         Returns:
             Rendered string output
         """
-        output = []
-        for node in nodes:
-            output.append(self._render_node(node))
+        output: list[str] = []
+        self._compile_block(nodes)([self.context], output)
         return "".join(output)
 
-    def _render_node(self, node: Node) -> str:
-        """Render a single AST node.
+    def compile(self, nodes: list[Node]) -> Callable[[dict[str, Any]], str]:
+        """Compile a list of AST nodes into a reusable render function.
+
+        Node dispatch, text splitting, and condition parsing are done once here;
+        the returned function only does the work that depends on the context.
+        Use it when the same template is rendered many times. Includes are
+        resolved with this renderer's paths.
 
         Args:
-            node: The AST node to render
+            nodes: List of parsed AST nodes to compile
 
         Returns:
-            Rendered string for this node
+            Function taking a context dictionary and returning the rendered string
         """
-        if isinstance(node, TextNode):
-            content = node.content
-
-            def replace_var(match):
-                var_name = match.group(1)
-                _val = self._get_variable_value(var_name)
-                return str(_val) if _val is not None else ""
-
-            content = re.sub(r"\$\{([\w\.]+)\}", replace_var, content)
-            return content
-
-        elif isinstance(node, VariableNode):
-            # Support dotted notation like "user.name"
-            value = self._get_variable_value(node.name)
-            return str(value) if value is not None else ""
-
-        elif isinstance(node, IfNode):
-            # Evaluate the condition expression
-            condition_result = self._evaluate_condition(node.condition)
-            if condition_result:
-                return self.render(node.true_block)
-            elif node.false_block:
-                return self.render(node.false_block)
-            return ""
-
-        elif isinstance(node, WhileNode):
-            output = []
-            while self._evaluate_condition(node.condition):
-                try:
-                    output.append(self.render(node.block))
-                except _BreakSignal:
-                    break
+        block = self._compile_block(fuse_text_nodes(nodes))
+
+        def render(context: dict[str, Any]) -> str:
+            output: list[str] = []
+            block([context], output)
             return "".join(output)
 
-        elif isinstance(node, ForNode):
-            iterable = self._resolve_iterable(node.iterable)
-            if not iterable:
-                return ""
+        return render
 
-            output = []
-            for item in iterable:
-                old_value = self.context.get(node.iterator)
+    def _compile_block(self, nodes: list[Node]) -> _CompiledBlock:
+        """Compile a list of AST nodes into a single block function."""
+        steps = [step for step in map(self._compile_node, nodes) if step is not None]
+        if len(steps) == 1:
+            return steps[0]
 
-                self.context[node.iterator] = item
+        def block(scopes: list[dict[str, Any]], output: list[str]) -> None:
+            for step in steps:
+                step(scopes, output)
+
+        return block
+
+    def _compile_node(self, node: Node) -> _CompiledBlock | None:
+        """Compile a single AST node, or return None if it renders nothing.
+
+        Node types without a handler (e.g. @effect or @state, which only have
+        meaning when executed as an agent) render nothing.
+        """
+        name = self._HANDLER_NAMES.get(type(node))
+        if name is None:
+            return None
+        compile_node: Callable[[Any], _CompiledBlock | None] = getattr(self, name)
+        return compile_node(node)
+
+    def _compile_text(self, node: TextNode) -> _CompiledBlock:
+        """Compile a text block, substituting ${var} references."""
+        content = node.content
+        if "${" not in content:
+            # Literal text: skip the placeholder scan and keep it out of the segment cache
+            return lambda _scopes, output: output.append(content)
+
+        segments = _split_text(content)
+        first = segments[0]
+        pairs = tuple(
+            (_compile_lookup(segments[i]), segments[i + 1]) for i in range(1, len(segments), 2)
+        )
+
+        def text(scopes: list[dict[str, Any]], output: list[str]) -> None:
+            output.append(first)
+            for lookup, literal in pairs:
+                value = lookup(scopes)
+                if value is not None:
+                    output.append(value if type(value) is str else str(value))
+                output.append(literal)
+
+        return text
+
+    def _compile_variable(self, node: VariableNode) -> _CompiledBlock:
+        """Compile a variable, supporting dotted notation like "user.name"."""
+        lookup = _compile_lookup(node.name)
+
+        def variable(scopes: list[dict[str, Any]], output: list[str]) -> None:
+            value = lookup(scopes)
+            output.append(value if type(value) is str else ("" if value is None else str(value)))
+
+        return variable
+
+    def _compile_if(self, node: IfNode) -> _CompiledBlock | None:
+        """Compile the true and false blocks of an if statement."""
+        constant = _fold_condition(node.condition)
+        if constant is not None:
+            # Only the branch a constant condition always takes is compiled
+            taken = node.true_block if constant else node.false_block
+            return self._compile_block(taken) if taken else None
+
+        condition = _compile_condition(node.condition)
+        true_block = self._compile_block(node.true_block)
+        false_block = self._compile_block(node.false_block) if node.false_block else None
+
+        def if_(scopes: list[dict[str, Any]], output: list[str]) -> None:
+            if condition(scopes):
+                true_block(scopes, output)
+            elif false_block is not None:
+                false_block(scopes, output)
+
+        return if_
+
+    def _compile_while(self, node: WhileNode) -> _CompiledBlock:
+        """Compile a while loop block that runs until its condition is false or it breaks."""
+        condition = _compile_condition(node.condition)
+        while_block = self._compile_block(node.block)
+
+        def while_(scopes: list[dict[str, Any]], output: list[str]) -> None:
+            while condition(scopes):
+                start = len(output)
                 try:
-                    output.append(self.render(node.block))
+                    while_block(scopes, output)
                 except _BreakSignal:
-                    if old_value is not None:
-                        self.context[node.iterator] = old_value
-                    else:
-                        self.context.pop(node.iterator, None)
+                    # Output of the iteration that hit the break is discarded
+                    del output[start:]
                     break
 
-                if old_value is not None:
-                    self.context[node.iterator] = old_value
-                else:
-                    self.context.pop(node.iterator, None)
+        return while_
 
-            return "".join(output)
+    def _compile_for(self, node: ForNode) -> _CompiledBlock:
+        """Compile a for loop block that runs once per item of the iterable.
 
-        elif isinstance(node, BreakNode):
+        The iterator is bound in its own scope, so it shadows an outer variable of
+        the same name without modifying the context.
+        """
+        iterator = node.iterator
+        resolve_iterable = _compile_iterable(node.iterable)
+        for_block = self._compile_block(node.block)
+
+        def for_(scopes: list[dict[str, Any]], output: list[str]) -> None:
+            # A missing or None iterable loops zero times
+            iterable = resolve_iterable(scopes) or ()
+            scope: dict[str, Any] = {}
+            scopes.append(scope)
+            try:
+                for item in iterable:
+                    scope[iterator] = item
+                    start = len(output)
+                    try:
+                        for_block(scopes, output)
+                    except _BreakSignal:
+                        del output[start:]
+                        break
+            finally:
+                scopes.pop()
+
+        return for_
+
+    def _compile_break(self, node: BreakNode) -> _CompiledBlock:
+        """Compile a break statement, which signals the enclosing loop to stop."""
+
+        def break_(_scopes: list[dict[str, Any]], _output: list[str]) -> None:
             raise _BreakSignal()
 
-        elif isinstance(node, AllAwaitNode):
-            return ""
+        return break_
 
-        elif isinstance(node, IncludeNode):
-            template_name = node.template_name
-            if not template_name.endswith(".mg"):
-                template_name += ".mg"
+    def _compile_include(self, node: IncludeNode) -> _CompiledBlock:
+        """Compile an include that renders the template in place.
 
-            include_path = self._resolve_include_path(template_name)
-
-            if include_path is None:
-                print(f"Included template not found: {template_name}")
-                return ""
+        The included template is located and compiled when the include is first
+        rendered, and again whenever its file changes. It only sees the variables
+        passed as params.
+        """
+        params = node.params
 
+        def include(_scopes: list[dict[str, Any]], output: list[str]) -> None:
+            start = len(output)
             try:
-                template_content = include_path.read_text()
+                include_file = self._find_include(node)
+                if include_file is None:
+                    return
 
-                parser = Parser()
-                _, included_nodes = parser.parse(template_content)
+                path, mtime_ns = include_file
+                compiled = self._compiled_includes.get(path)
+                if compiled is None or compiled[0] != mtime_ns:
+                    compiled = (mtime_ns, self._compile_block(_load_include(path, mtime_ns)))
+                    self._compiled_includes[path] = compiled
 
                 # Included templates only see variables explicitly passed as params
-                include_context = dict(node.params)
-
-                included_renderer = Renderer(
-                    context=include_context,
-                    base_path=self.base_path,
-                    include_paths=self.include_paths,
-                    package_paths=self.package_paths,
-                )
-                return included_renderer.render(included_nodes)
+                compiled[1]([params], output)
 
             except Exception:
-                return ""
-        else:
-            return ""
+                del output[start:]
+
+        return include
+
+    def _find_include(self, node: IncludeNode) -> tuple[str, int] | None:
+        """Locate the template of an include node.
+
+        Args:
+            node: The include node to locate
+
+        Returns:
+            Tuple of the template path and its modification time in nanoseconds,
+            or None if the template was not found
+        """
+        template_name = node.template_name
+        if not template_name.endswith(".mg"):
+            template_name += ".mg"
+
+        # Local files always win, so base_path is checked on every call; a file
+        # added there later shadows a remembered package or include_paths match
+        local_path = self.base_path / template_name
+        try:
+            return str(local_path), local_path.stat().st_mtime_ns
+        except OSError:
+            pass
+
+        include_path = self._include_files.get(node.template_name)
+        if include_path is not None:
+            try:
+                return str(include_path), include_path.stat().st_mtime_ns
+            except OSError:
+                # The file moved or was deleted; resolve it again
+                del self._include_files[node.template_name]
+
+        include_path = self._resolve_include_path(template_name)
+
+        if include_path is None:
+            print(f"Included template not found: {template_name}")
+            return None
+
+        self._include_files[node.template_name] = include_path
+        return str(include_path), include_path.stat().st_mtime_ns
 
     def _resolve_include_path(self, template_name: str) -> Path | None:
         """Resolve the path to an included template.
@@ -365,80 +805,6 @@ class Renderer:
 
         return None
 
-    def _resolve_iterable(self, expr: str) -> Any:
-        """Resolve a for-loop iterable — either a context variable or a range() call."""
-        expr = expr.strip()
-        range_match = re.match(r"^range\((.+)\)$", expr)
-        if range_match:
-            args_str = range_match.group(1)
-            args = [arg.strip() for arg in args_str.split(",")]
-            int_args = []
-            for arg in args:
-                try:
-                    int_args.append(int(arg))
-                except ValueError:
-                    val = self._get_variable_value(arg)
-                    if val is None:
-                        return []
-                    int_args.append(int(val))
-            return range(*int_args)
-        return self._get_variable_value(expr)
-
-    def _get_variable_value(self, name: str) -> Any:
-        """Get a variable value from context, supporting dotted notation.
-
-        Args:
-            name: Variable name, possibly with dots like "user.name"
-
-        Returns:
-            The variable value or None if not found
-        """
-        parts = name.split(".")
-        value = self.context
-
-        for part in parts:
-            if isinstance(value, dict):
-                value = value.get(part)
-            elif hasattr(value, part):
-                value = getattr(value, part)
-            else:
-                return None
-
-            if value is None:
-                return None
-
-        return value
-
-    def _evaluate_condition(self, condition: str) -> bool | None:
-        """Safely evaluate a condition expression using the ast module.
-
-        Supports: or, and, not, in, not in, ==, !=, >, <, >=, <=, and simple truthy checks.
-        No arbitrary code execution — only a strict whitelist of AST node types is allowed.
-
-        Args:
-            condition: The condition string to evaluate
-
-        Returns:
-            True if the condition is true, False otherwise, None on error
-        """
-        condition = condition.strip()
-
-        does_condition_contain_equality_or_logical = any(
-            op in condition for op in EQUALITY_OR_LOGICAL_OPERATORS
-        )
-
-        if does_condition_contain_equality_or_logical:
-            try:
-                tree = ast.parse(condition, mode="eval")
-                result = _SafeConditionEvaluator(self.context).visit(tree.body)
-                return bool(result)
-            except Exception:
-                return None
-
-        # Simple variable — evaluate as a truthy check
-        value = self._get_variable_value(condition)
-        return self._is_truthy(value)
-
     @staticmethod
     def _is_truthy(value: Any) -> bool:
         """Determine if a value is truthy for conditional evaluation.
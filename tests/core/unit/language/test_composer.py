@@ -125,6 +125,16 @@ for item in items:
         assert "You are a assistant." in result
         assert "Task: Help the user" in result
 
+    def test_render_should_reuse_compiled_template_when_rendered_with_new_context(self):
+        self._create_template("greeting.mg", "<<Hello, ${name}!>>")
+
+        result1 = self.composer.render("greeting.mg", {"name": "Alice"})
+        result2 = self.composer.render("greeting.mg", {"name": "Bob"})
+
+        assert result1 == "Hello, Alice!\n"
+        assert result2 == "Hello, Bob!\n"
+        assert list(self.composer._compiled_cache) == ["greeting.mg"]
+
     def test_render_should_render_template_when_context_is_empty(self):
         self._create_template("empty.mg", "<<No variables here.>>")
 
@@ -132,6 +142,13 @@ for item in items:
 
         assert result == "No variables here.\n"
 
+    def test_render_should_render_template_when_context_is_none(self):
+        self._create_template("none.mg", "<<Hi ${name}>>")
+
+        result = self.composer.render("none.mg", None)
+
+        assert result == "Hi \n"
+
     def test_render_should_render_empty_string_when_variable_is_missing(self):
         self._create_template("missing.mg", "<<Hello, ${name}!>>")
 
@@ -1,3 +1,6 @@
+import sys
+from unittest.mock import patch
+
 from margarita.language.parser import (
     AllAwaitNode,
     BreakNode,
@@ -11,12 +14,15 @@ from margarita.language.parser import (
     StateNode,
     TextNode,
     WhileNode,
+    fuse_text_nodes,
 )
 
 
 class TestParser:
-    def setup_method(self):
-        self.parser = Parser()
+    @classmethod
+    def setup_class(cls):
+        # parse() resets all parser state, so one parser serves every test
+        cls.parser = Parser()
 
     def test_parse_should_parse_text_when_template_is_plain_text(self):
         template = "<<Hello, world!>>"
@@ -288,6 +294,28 @@ if condition:
         assert isinstance(nodes[0], ImportNode)
         assert nodes[0].raw_import == "from package import module, function, Class"
 
+    def test_parse_should_reset_is_mgx_when_parser_is_reused_for_plain_template(self):
+        self.parser.parse("@state count = 0")
+
+        self.parser.parse("<<Hello>>")
+
+        assert self.parser.is_mgx is False
+
+    def test_parse_should_reuse_cached_result_when_template_is_parsed_again(self):
+        template = "---\nparameter: name (str) cached parse test\n---\n@state seen = 1\n<<Hi>>"
+        first_metadata, first_nodes = self.parser.parse(template)
+
+        with patch.object(Parser, "_parse_uncached") as parse_uncached:
+            parser = Parser()
+            metadata, nodes = parser.parse(template)
+
+        parse_uncached.assert_not_called()
+        assert parser.is_mgx is True
+        assert metadata == first_metadata
+        assert nodes == first_nodes
+        assert nodes is not first_nodes
+        assert metadata["parameters"] is not first_metadata["parameters"]
+
     def test_parse_should_set_is_mgx_when_template_has_import(self):
         template = """import os
 <<Hello World>>"""
@@ -458,6 +486,14 @@ if rules:
         assert metadata == {}
         assert len(nodes) == 0
 
+    def test_parse_should_return_empty_nodes_when_template_is_only_blank_lines(self):
+        self.parser.parse("---\ntask: first\n---\n<<Hello>>")
+
+        metadata, nodes = self.parser.parse("  \n\t\n  ")
+
+        assert metadata == {}
+        assert nodes == []
+
     def test_parse_should_parse_whitespace_when_template_has_only_whitespace(self):
         template = "<<   \n  \n  >>"
         metadata, nodes = self.parser.parse(template)
@@ -535,6 +571,78 @@ email: user@example.com
         assert ":" in metadata["description"]
         assert metadata["email"] == "user@example.com"
 
+    def test_parse_should_ignore_metadata_lines_when_key_or_value_is_invalid(self):
+        template = """---
+task: summarization
+bad key: ignored
+empty:
+no separator
+---
+
+<<Content>>"""
+        metadata, nodes = self.parser.parse(template)
+
+        assert metadata == {"task": "summarization"}
+        assert nodes == [TextNode("Content\n")]
+
+    def test_parse_should_keep_blank_lines_when_comments_are_inside_text_block(self):
+        template = """// leading comment
+<<
+First
+
+    // inner comment
+Second
+>>
+// trailing comment"""
+        metadata, nodes = self.parser.parse(template)
+
+        assert nodes == [TextNode("First\n\nSecond\n")]
+
+    def test_parse_should_keep_body_when_comment_precedes_dashes(self):
+        template = "// header\n---\n<<Hello>>\n<<World>>"
+
+        metadata, nodes = self.parser.parse(template)
+
+        assert metadata == {}
+        assert nodes == [TextNode("Hello\n"), TextNode("World\n")]
+
+    def test_parse_should_not_parse_metadata_when_comment_precedes_metadata_block(self):
+        template = "// header\n---\ntitle: x\n---\n<<Hello>>"
+
+        metadata, nodes = self.parser.parse(template)
+
+        assert metadata == {}
+        assert nodes == [TextNode("Hello\n")]
+
+    def test_parse_should_parse_nested_blocks_when_nesting_exceeds_recursion_limit(self):
+        depth = sys.getrecursionlimit() + 100
+        template = "\n".join(" " * level + f"if c{level}:" for level in range(depth))
+        template += "\n" + " " * depth + "<<deep>>"
+
+        metadata, nodes = self.parser.parse(template)
+
+        node = nodes[0]
+        for _ in range(1, depth):
+            assert isinstance(node, IfNode)
+            node = node.true_block[0]
+        assert node.condition == f"c{depth - 1}"
+        assert node.true_block == [TextNode("deep\n")]
+
+    def test_parse_should_parse_include_params_when_values_are_unquoted_or_empty(self):
+        template = '[[ card\tname=Ada title="" role="lead dev" level=3 ]]'
+        metadata, nodes = self.parser.parse(template)
+
+        assert nodes == [
+            IncludeNode("card", {"name": "Ada", "title": "", "role": "lead dev", "level": "3"})
+        ]
+
+    def test_parse_should_drop_carriage_returns_when_template_has_windows_line_endings(self):
+        template = "---\r\ntask: demo\r\n---\r\n<<\r\nFirst\r\n\r\nSecond\r\n>>\r\n"
+        metadata, nodes = self.parser.parse(template)
+
+        assert metadata == {"task": "demo"}
+        assert nodes == [TextNode("First\n\nSecond\n")]
+
     def test_parse_should_parse_all_includes_when_template_has_multiple_includes(self):
         template = """[[ header.mg ]]
 <<Content here>>
@@ -608,8 +716,9 @@ email: user@example.com
 
 
 class TestParserEdgeCases:
-    def setup_method(self):
-        self.parser = Parser()
+    @classmethod
+    def setup_class(cls):
+        cls.parser = Parser()
 
     def test_parse_should_parse_if_when_if_statement_is_unclosed(self):
         template = """if condition:
@@ -654,8 +763,9 @@ class TestParserEdgeCases:
 class TestNewSyntaxValidation:
     """Tests to validate the new Python-style syntax features."""
 
-    def setup_method(self):
-        self.parser = Parser()
+    @classmethod
+    def setup_class(cls):
+        cls.parser = Parser()
 
     def test_parse_should_require_text_blocks_for_plain_text(self):
         """Plain text without << >> delimiters should not be parsed as text nodes."""
@@ -1045,3 +1155,50 @@ if show_items:
         assert isinstance(nodes[0], WhileNode)
         assert len(nodes[0].block) == 1
         assert isinstance(nodes[0].block[0], TextNode)
+
+
+def test_fuse_text_nodes_should_merge_literal_text_when_text_nodes_are_adjacent():
+    # Arrange
+    _, nodes = Parser().parse("<<Hello>>\n<<World>>\n<<Hi ${name}>>")
+
+    # Act
+    fused = fuse_text_nodes(nodes)
+
+    # Assert
+    assert fused == [TextNode("Hello\nWorld\n"), TextNode("Hi ${name}\n")]
+    assert len(nodes) == 3
+
+
+def test_fuse_text_nodes_should_merge_inside_blocks_when_node_is_control_flow():
+    # Arrange
+    template = """for item in items:
+    <<A>>
+    <<B>>
+if flag:
+    <<C>>
+    <<D>>
+else:
+    <<E>>
+    <<F>>"""
+    _, nodes = Parser().parse(template)
+
+    # Act
+    fused = fuse_text_nodes(nodes)
+
+    # Assert
+    assert fused == [
+        ForNode("item", "items", [TextNode("A\nB\n")]),
+        IfNode("flag", [TextNode("C\nD\n")], [TextNode("E\nF\n")]),
+    ]
+    assert len(nodes[0].block) == 2
+
+
+def test_fuse_text_nodes_should_keep_nodes_separate_when_merge_would_form_variable():
+    # Arrange
+    nodes = [TextNode("cost: $"), TextNode("{amount}")]
+
+    # Act
+    fused = fuse_text_nodes(nodes)
+
+    # Assert
+    assert fused == nodes